@@ -4,11 +4,14 @@
 # ======================================================================================
 import streamlit as st
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain, compress
 import json
+import orjson
+import numpy as np
 import pandas as pd
-import re
 import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
@@ -17,66 +20,121 @@ import yagmail
 import smtplib
 
 from app_shared import (
+    GOOGLE_SHEETS_SCOPES,
     current_authorized_store,
     filter_stores_for_access,
     initialize_access_state,
     is_store_profile_active,
     render_sidebar,
     require_access,
+    sheet_range,
 )
 
 # --- 1. CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(layout="wide", page_title="Cuadre Diario de Caja")
 
+# Separador de miles colombiano: "," -> "." (tabla de traducción construida una sola vez)
+THOUSANDS_SEPARATOR_TABLE = str.maketrans(",", ".")
+# Elimina "(" y ")" del nombre de la tienda en las descripciones del TXT
+PARENTHESES_DELETE_TABLE = str.maketrans("", "", "()")
+
+# Columnas de los editores de movimientos (se construyen una sola vez, no en cada rerun)
+VALOR_COLUMN = st.column_config.NumberColumn("Valor", format="$ %.0f", min_value=0, step=1, required=True)
+FECHA_COLUMN = st.column_config.TextColumn("Fecha", required=True)
+TARJETAS_COLUMN_CONFIG = {"Valor": VALOR_COLUMN, "Fecha": FECHA_COLUMN}
+
+# Proporciones de la fila de selección de registro (tienda, fecha, cargar, nuevo)
+SELECTION_COLUMNS_SPEC = (2, 2, 1, 1)
+
 # --- 2. CONEXIÓN SEGURA A GOOGLE SHEETS ---
-@st.cache_resource(ttl=600)
+@st.cache_resource
+def open_cuadre_worksheets():
+    """
+    Autoriza el cliente de gspread y abre las hojas de trabajo del cuadre una sola vez
+    por proceso. google-auth renueva el token automáticamente, por lo que no se usa TTL.
+    """
+    creds_json = dict(st.secrets["google_credentials"])
+    creds = Credentials.from_service_account_info(creds_json, scopes=GOOGLE_SHEETS_SCOPES)
+    client = gspread.authorize(creds)
+    sheet = client.open(st.secrets["google_sheets"]["spreadsheet_name"])
+    registros_ws = sheet.worksheet(st.secrets["google_sheets"]["registros_sheet_name"])
+    config_ws = sheet.worksheet(st.secrets["google_sheets"]["config_sheet_name"])
+    consecutivos_ws = sheet.worksheet("Consecutivos")
+    
+    global_consecutivo_ws = sheet.worksheet("GlobalConsecutivo")
+    
+    return registros_ws, config_ws, consecutivos_ws, global_consecutivo_ws
+
 def connect_to_gsheet():
     """
     Establece conexión con Google Sheets usando las credenciales de st.secrets.
-    Retorna los objetos de las hojas de trabajo necesarias.
+    Retorna los objetos de las hojas de trabajo necesarias. Los errores no quedan en
+    caché, así que un fallo de conexión se reintenta en el siguiente rerun.
     """
     try:
-        creds_json = dict(st.secrets["google_credentials"])
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open(st.secrets["google_sheets"]["spreadsheet_name"])
-        registros_ws = sheet.worksheet(st.secrets["google_sheets"]["registros_sheet_name"])
-        config_ws = sheet.worksheet(st.secrets["google_sheets"]["config_sheet_name"])
-        consecutivos_ws = sheet.worksheet("Consecutivos")
-        
-        global_consecutivo_ws = sheet.worksheet("GlobalConsecutivo")
-        
-        return registros_ws, config_ws, consecutivos_ws, global_consecutivo_ws
+        return open_cuadre_worksheets()
     except Exception as e:
         st.error(f"Error fatal al conectar con Google Sheets: {e}")
         st.warning("Verifique las credenciales y los nombres de las hojas (incluyendo 'GlobalConsecutivo') en los 'secrets' de Streamlit.")
         return None, None, None, None
 
 # --- 3. LÓGICA DE DATOS Y PROCESAMIENTO ---
+@st.cache_data(ttl=600, show_spinner=False)
+def load_app_config(_config_ws):
+    """
+    Lee la hoja 'Configuracion' y arma las listas de tiendas, bancos y terceros.
+    El resultado queda en caché 10 minutos para no consultar la hoja en cada rerun.
+    """
+    config_data = _config_ws.get_all_records()
+    tiendas = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'TIENDA' and d.get('Detalle'))))
+    bancos = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'BANCO' and d.get('Detalle'))))
+    terceros = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'TERCERO' and d.get('Detalle'))))
+    return tiendas, bancos, terceros
+
 def get_app_config(config_ws):
     """
     Carga la configuración esencial (tiendas, bancos, terceros) desde la hoja 'Configuracion'.
     Usa .strip() para eliminar espacios en blanco y asegura ignorar filas vacías.
     """
     try:
-        config_data = config_ws.get_all_records()
-        tiendas = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'TIENDA' and d.get('Detalle'))))
-        bancos = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'BANCO' and d.get('Detalle'))))
-        terceros = sorted(list(set(str(d['Detalle']).strip() for d in config_data if d.get('Tipo Movimiento') == 'TERCERO' and d.get('Detalle'))))
-        return tiendas, bancos, terceros
+        return load_app_config(config_ws)
     except Exception as e:
         st.error(f"Error al cargar la configuración de tiendas, bancos y terceros: {e}")
         return [], [], []
 
-def get_account_mappings(config_ws):
+def values_to_records(values):
     """
-    Crea un diccionario de mapeo de cuentas a partir de la hoja 'Configuracion'.
+    Convierte filas crudas en diccionarios con la primera fila como encabezado, como `get_all_records()`.
+    No convierte números: las celdas llegan como texto formateado y los lectores usan float() donde hace falta.
+    """
+    if not values:
+        return []
+    headers = values[0]
+    header_count = len(headers)
+    return [dict(zip(headers, row + [""] * (header_count - len(row)))) for row in values[1:]]
+
+def batch_get_records(spreadsheet, worksheets):
+    """
+    Lee varias hojas completas en una sola petición `values_batch_get` y retorna
+    los registros de cada una, en el mismo orden recibido.
+    """
+    response = spreadsheet.values_batch_get([sheet_range(ws.title) for ws in worksheets])
+    value_ranges = response.get("valueRanges", [])
+    value_ranges += [{}] * (len(worksheets) - len(value_ranges))
+    return [values_to_records(value_range.get("values", [])) for value_range in value_ranges]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_report_records(_registros_ws, _config_ws):
+    """Lee 'Registros' y 'Configuracion' para los reportes en una sola petición, en caché 5 minutos."""
+    return batch_get_records(_registros_ws.spreadsheet, [_registros_ws, _config_ws])
+
+def get_account_mappings(config_records):
+    """
+    Crea un diccionario de mapeo de cuentas a partir de los registros de la hoja 'Configuracion'.
     """
     try:
-        records = config_ws.get_all_records()
         mappings = {}
-        for record in records:
+        for record in config_records:
             tipo = record.get("Tipo Movimiento")
             detalle = record.get("Detalle")
             cuenta = record.get("Cuenta Contable")
@@ -97,29 +155,43 @@ def get_account_mappings(config_ws):
         st.error(f"Error al leer el mapeo de cuentas. Revisa la estructura de la hoja 'Configuracion'. Error: {e}")
         return {}
 
+def filter_records(all_records, start_date, end_date, selected_store):
+    """
+    Filtra los registros de 'Registros' por rango de fechas (DD/MM/YYYY) y tienda.
+    Las fechas se convierten en un solo `pd.to_datetime` y el filtro es una máscara
+    booleana. Lanza ValueError si alguna fecha no tiene el formato esperado; las
+    celdas de fecha vacías no entran en ningún rango.
+    """
+    fechas = pd.to_datetime([r.get('Fecha', '01/01/1900') for r in all_records], format='%d/%m/%Y')
+    keep_mask = (fechas >= pd.Timestamp(start_date)) & (fechas <= pd.Timestamp(end_date))
+    if selected_store != "Todas las Tiendas":
+        tiendas = np.array([str(r.get('Tienda', '')).strip() for r in all_records], dtype=object)
+        keep_mask &= tiendas == selected_store
+    return list(compress(all_records, keep_mask))
+
+# Tipos de movimiento del TXT y su columna en 'Registros', en el orden de emisión
+TXT_MOVIMIENTO_COLUMNS = (
+    ('TARJETA', 'Tarjetas'),
+    ('CONSIGNACION', 'Consignaciones'),
+    ('GASTO', 'Gastos'),
+    ('EFECTIVO', 'Efectivo'),
+)
+
 def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_store):
     """
     Genera el contenido del archivo TXT para el ERP, con filtros por fecha y tienda.
     """
     st.info("Generando archivo TXT... Esto puede tardar unos segundos.")
     
-    all_records = registros_ws.get_all_records()
-    account_mappings = get_account_mappings(config_ws)
+    all_records, config_records = load_report_records(registros_ws, config_ws)
+    account_mappings = get_account_mappings(config_records)
 
     if not account_mappings:
         st.error("No se pudo generar el reporte: Faltan mapeos de cuentas en 'Configuracion'.")
         return None
 
     try:
-        date_filtered_records = [
-            r for r in all_records
-            if start_date <= datetime.strptime(r.get('Fecha', '01/01/1900'), '%d/%m/%Y').date() <= end_date
-        ]
-        if selected_store == "Todas las Tiendas":
-            filtered_records = date_filtered_records
-        else:
-            filtered_records = [r for r in date_filtered_records if str(r.get('Tienda', '')).strip() == selected_store]
-
+        filtered_records = filter_records(all_records, start_date, end_date, selected_store)
     except ValueError as e:
         st.error(f"Error de formato de fecha en 'Registros'. Asegúrese que las fechas sean DD/MM/YYYY. Error: {e}")
         return None
@@ -129,7 +201,18 @@ def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_st
         return None
 
     filtered_records.sort(key=lambda r: (r.get('Tienda', ''), r.get('Fecha', '')))
-    txt_lines = []
+    # Las líneas se escriben directo en el buffer, separadas por "\n" (sin salto final)
+    buffer = io.StringIO()
+
+    def write_line(line):
+        if buffer.tell():
+            buffer.write("\n")
+        buffer.write(line)
+
+    # Cuentas fijas resueltas una sola vez, fuera del ciclo de movimientos
+    cuenta_tarjeta = account_mappings.get('Tarjetas', {}).get('cuenta', 'ERR_TARJETA')
+    cuenta_reintegro = account_mappings.get('Reintegro Caja Menor', {}).get('cuenta', 'ERR_GASTO')
+    cuenta_venta = "11050501"
     
     for record in filtered_records:
         consecutivo_referencia = record.get('Consecutivo_Asignado', '0')
@@ -138,19 +221,12 @@ def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_st
         tienda = str(record.get('Tienda', ''))
         fecha_cuadre = record['Fecha']
         centro_costo = tienda 
-        tienda_descripcion = re.sub(r'[\(\)]', '', tienda).strip()
+        tienda_descripcion = tienda.translate(PARENTHESES_DELETE_TABLE).strip()
         total_debito_dia = 0
 
-        movimientos = {
-            'TARJETA': json.loads(record.get('Tarjetas', '[]')),
-            'CONSIGNACION': json.loads(record.get('Consignaciones', '[]')),
-            'GASTO': json.loads(record.get('Gastos', '[]')),
-            'EFECTIVO': json.loads(record.get('Efectivo', '[]'))
-        }
-
-        for tipo_mov, data_list in movimientos.items():
-            for item in data_list:
-                valor = float(item.get('Valor', 0))
+        for tipo_mov, columna in TXT_MOVIMIENTO_COLUMNS:
+            for item in load_movimientos(record.get(columna)):
+                valor = float(item.get('Valor') or 0)
                 if valor == 0: continue
                 total_debito_dia += valor
 
@@ -161,7 +237,7 @@ def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_st
                 descripcion = f"Ventas planillas contado {tienda_descripcion}"
                 
                 if tipo_mov == 'TARJETA':
-                    cuenta = account_mappings.get('Tarjetas', {}).get('cuenta', 'ERR_TARJETA')
+                    cuenta = cuenta_tarjeta
                     serie_documento = f"T{centro_costo}"
                     fecha_tarjeta = item.get('Fecha', '')
                     descripcion = f"Ventas planillas contado Tarjeta {fecha_tarjeta} - {tienda_descripcion}"
@@ -183,10 +259,10 @@ def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_st
                             nombre_tercero_desc = tercero_info.get('nombre', gasto_tercero)
                             descripcion = f"{item.get('Descripción', 'Gasto')} - {nombre_tercero_desc}"
                         else:
-                            cuenta = account_mappings.get('Reintegro Caja Menor', {}).get('cuenta', 'ERR_GASTO')
+                            cuenta = cuenta_reintegro
                             descripcion = f"{item.get('Descripción', 'Gasto')} (Tercero {gasto_tercero} no encontrado)"
                     else:
-                        cuenta = account_mappings.get('Reintegro Caja Menor', {}).get('cuenta', 'ERR_GASTO')
+                        cuenta = cuenta_reintegro
                         descripcion = item.get('Descripción', 'Gasto Varios')
 
                 elif tipo_mov == 'EFECTIVO':
@@ -206,44 +282,34 @@ def generate_txt_file(registros_ws, config_ws, start_date, end_date, selected_st
                     else:
                         cuenta = account_mappings.get(tipo_especifico, {}).get('cuenta', f'ERR_{tipo_especifico}')
 
-                linea = "|".join([
-                    fecha_cuadre, str(consecutivo_documento), str(cuenta), "8",
-                    descripcion, serie_documento, str(consecutivo_referencia),
-                    str(valor), "0", centro_costo, nit_tercero, nombre_tercero_final, "0"
-                ])
-                txt_lines.append(linea)
+                write_line(
+                    f"{fecha_cuadre}|{consecutivo_documento}|{cuenta}|8|"
+                    f"{descripcion}|{serie_documento}|{consecutivo_referencia}|"
+                    f"{valor}|0|{centro_costo}|{nit_tercero}|{nombre_tercero_final}|0"
+                )
 
         # Línea de contrapartida (crédito)
         if total_debito_dia > 0:
-            cuenta_venta = "11050501"
             descripcion_credito = f"Ventas planillas contado {tienda_descripcion}"
             
-            linea_credito = "|".join([
-                fecha_cuadre, str(consecutivo_documento), str(cuenta_venta), "8",
-                descripcion_credito, centro_costo, str(consecutivo_referencia),
-                "0", str(total_debito_dia), centro_costo, "0", "0", "0"
-            ])
-            txt_lines.append(linea_credito)
+            write_line(
+                f"{fecha_cuadre}|{consecutivo_documento}|{cuenta_venta}|8|"
+                f"{descripcion_credito}|{centro_costo}|{consecutivo_referencia}|"
+                f"0|{total_debito_dia}|{centro_costo}|0|0|0"
+            )
             
-    return "\n".join(txt_lines)
+    return buffer.getvalue()
 
 # --- GENERADOR DE EXCEL ---
-def generate_excel_report(registros_ws, start_date, end_date, selected_store):
+def generate_excel_report(registros_ws, config_ws, start_date, end_date, selected_store):
     """
     Genera un archivo Excel profesional y detallado para la revisión del cuadre de caja.
     """
     st.info("Generando reporte Excel profesional... Esto puede tardar unos segundos.")
 
     try:
-        all_records = registros_ws.get_all_records()
-        date_filtered_records = [
-            r for r in all_records
-            if start_date <= datetime.strptime(r.get('Fecha', '01/01/1900'), '%d/%m/%Y').date() <= end_date
-        ]
-        if selected_store == "Todas las Tiendas":
-            filtered_records = date_filtered_records
-        else:
-            filtered_records = [r for r in date_filtered_records if str(r.get('Tienda', '')).strip() == selected_store]
+        all_records, _ = load_report_records(registros_ws, config_ws)
+        filtered_records = filter_records(all_records, start_date, end_date, selected_store)
     except Exception as e:
         st.error(f"Error al filtrar registros para Excel: {e}")
         return None
@@ -328,7 +394,7 @@ def generate_excel_report(registros_ws, start_date, end_date, selected_store):
         }
 
         for cat_name, (json_key, default_val) in movimientos_map.items():
-            data_list = json.loads(record.get(json_key, default_val))
+            data_list = load_movimientos(record.get(json_key, default_val))
             if not data_list: continue
 
             ws.merge_cells(start_row=current_row, start_column=2, end_row=current_row, end_column=6)
@@ -339,7 +405,7 @@ def generate_excel_report(registros_ws, start_date, end_date, selected_store):
             current_row += 1
 
             for item in data_list:
-                valor = float(item.get('Valor', 0))
+                valor = float(item.get('Valor') or 0)
                 if valor == 0: continue
                 
                 ws.cell(row=current_row, column=2, value=item.get('Tipo', cat_name.rstrip('s')))
@@ -421,9 +487,7 @@ def format_cop(value):
     """
     if not isinstance(value, (int, float)):
         return "$ 0"
-    formatted_value = f"{value:,.0f}"
-    formatted_value = formatted_value.replace(",", ".")
-    return f"$ {formatted_value}"
+    return f"$ {value:,.0f}".translate(THOUSANDS_SEPARATOR_TABLE)
 
 def generate_professional_email_body(records, start_date, end_date, selected_store):
     """
@@ -473,10 +537,10 @@ def generate_professional_email_body(records, start_date, end_date, selected_sto
         for fecha, daily_records in date_grouped_records.items():
             venta_total_sistema = sum(float(r.get('Venta_Total_Dia', 0)) for r in daily_records)
             
-            total_tarjetas = sum(sum(float(t.get('Valor', 0)) for t in json.loads(r.get('Tarjetas', '[]'))) for r in daily_records)
-            total_consignaciones = sum(sum(float(c.get('Valor', 0)) for c in json.loads(r.get('Consignaciones', '[]'))) for r in daily_records)
-            total_gastos = sum(sum(float(g.get('Valor', 0)) for g in json.loads(r.get('Gastos', '[]'))) for r in daily_records)
-            total_efectivo = sum(sum(float(e.get('Valor', 0)) for e in json.loads(r.get('Efectivo', '[]'))) for r in daily_records)
+            total_tarjetas = sum(sum(float(t.get('Valor') or 0) for t in load_movimientos(r.get('Tarjetas'))) for r in daily_records)
+            total_consignaciones = sum(sum(float(c.get('Valor') or 0) for c in load_movimientos(r.get('Consignaciones'))) for r in daily_records)
+            total_gastos = sum(sum(float(g.get('Valor') or 0) for g in load_movimientos(r.get('Gastos'))) for r in daily_records)
+            total_efectivo = sum(sum(float(e.get('Valor') or 0) for e in load_movimientos(r.get('Efectivo'))) for r in daily_records)
             
             total_desglose = total_tarjetas + total_consignaciones + total_gastos + total_efectivo
             diferencia = venta_total_sistema - total_desglose
@@ -574,7 +638,7 @@ def generate_professional_email_body(records, start_date, end_date, selected_sto
 </html>"""
     return html_body
 
-def send_summary_email(registros_ws, start_date, end_date, selected_store, recipient_email):
+def send_summary_email(registros_ws, config_ws, start_date, end_date, selected_store, recipient_email):
     """
     Filtra los datos, genera el resumen con el nuevo diseño y lo envía por correo.
     """
@@ -589,15 +653,8 @@ def send_summary_email(registros_ws, start_date, end_date, selected_store, recip
         return
 
     try:
-        all_records = registros_ws.get_all_records()
-        date_filtered_records = [
-            r for r in all_records
-            if start_date <= datetime.strptime(r.get('Fecha', '01/01/1900'), '%d/%m/%Y').date() <= end_date
-        ]
-        if selected_store == "Todas las Tiendas":
-            filtered_records = date_filtered_records
-        else:
-            filtered_records = [r for r in date_filtered_records if str(r.get('Tienda', '')).strip() == selected_store]
+        all_records, _ = load_report_records(registros_ws, config_ws)
+        filtered_records = filter_records(all_records, start_date, end_date, selected_store)
     except Exception as e:
         st.error(f"Error al filtrar los registros para el correo: {e}")
         return
@@ -631,57 +688,123 @@ def send_summary_email(registros_ws, start_date, end_date, selected_store, recip
 # ======================================================================================
 
 # --- 4. GESTIÓN DEL ESTADO DE LA SESIÓN ---
-def initialize_session_state():
-    """Inicializa el estado de la sesión para almacenar datos del formulario."""
-    defaults = {
-        'page': 'Formulario', 'venta_total_dia': 0.0, 'factura_inicial': "", 'factura_final': "",
+MOVIMIENTO_KEYS = ('tarjetas', 'consignaciones', 'gastos', 'efectivo')
+
+def form_state_defaults():
+    """Valores iniciales de los campos del cuadre (listas nuevas en cada llamada)."""
+    return {
+        'venta_total_dia': 0.0, 'factura_inicial': "", 'factura_final': "",
         'tarjetas': [], 'consignaciones': [], 'gastos': [], 'efectivo': [],
-        'authenticated': False
     }
+
+def initialize_session_state():
+    """Inicializa el estado de la sesión para almacenar datos del formulario."""
+    defaults = {'page': 'Formulario', **form_state_defaults(), 'authenticated': False}
     for k, v in defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
 
 def clear_form_state():
-    """Limpia el formulario, conservando la tienda, fecha y estado de autenticación."""
-    tienda = st.session_state.get('tienda_seleccionada', None)
-    fecha = st.session_state.get('fecha_seleccionada', datetime.now().date())
-    auth_status = st.session_state.get('authenticated', False)
-    access_role = st.session_state.get('access_role', 'guest')
-    store_profile_key = st.session_state.get('store_profile_key', '')
-    store_profile_label = st.session_state.get('store_profile_label', '')
-    authorized_store = st.session_state.get('authorized_store', '')
-    authorized_series = st.session_state.get('authorized_series', [])
-    
-    keys_to_keep = [
-        'page',
-        'tienda_seleccionada',
-        'fecha_seleccionada',
-        'authenticated',
-        'access_role',
-        'store_profile_key',
-        'store_profile_label',
-        'authorized_store',
-        'authorized_series',
-    ]
-    for key in list(st.session_state.keys()):
-        if key not in keys_to_keep:
-            del st.session_state[key]
-            
-    initialize_session_state()
-    st.session_state.tienda_seleccionada = tienda
-    st.session_state.fecha_seleccionada = fecha
-    st.session_state.authenticated = auth_status
-    st.session_state.access_role = access_role
-    st.session_state.store_profile_key = store_profile_key
-    st.session_state.store_profile_label = store_profile_label
-    st.session_state.authorized_store = authorized_store
-    st.session_state.authorized_series = authorized_series
+    """
+    Limpia el formulario reasignando solo las claves del cuadre a sus valores iniciales
+    y descartando el estado derivado de los editores. La tienda, la fecha y el estado
+    de autenticación (incluido `access_role`) no se tocan.
+    """
+    for key, value in form_state_defaults().items():
+        st.session_state[key] = value
+    for key in MOVIMIENTO_KEYS:
+        for derived_key in (f"df_{key}", f"hash_{key}", f"editor_{key}"):
+            st.session_state.pop(derived_key, None)
 
 # --- 5. COMPONENTES DE LA INTERFAZ DE USUARIO ---
+@lru_cache(maxsize=2048)
+def format_pesos(pesos):
+    """Formatea un monto entero en pesos (ej: $1.234.567); memorizado porque los montos se repiten entre reruns."""
+    return f"${pesos:,}".translate(THOUSANDS_SEPARATOR_TABLE)
+
 def format_currency(num):
     """Formatea un número como moneda colombiana (ej: $1.234.567)."""
-    return f"${int(num):,}".replace(",", ".") if isinstance(num, (int, float)) else "$0"
+    return format_pesos(int(num)) if isinstance(num, (int, float)) else "$0"
+
+def get_valor(item):
+    """Valor de un movimiento; un 'Valor' ausente o nulo cuenta como 0."""
+    return item.get('Valor') or 0
+
+def sum_valores(*item_lists):
+    """
+    Suma la columna 'Valor' de una o varias listas de movimientos del cuadre en una sola
+    reducción de NumPy. Las celdas vaciadas en el editor (NaN) no suman, igual que en pandas.
+    """
+    count = sum(map(len, item_lists))
+    if not count:
+        return 0.0
+    valores = np.fromiter(map(get_valor, chain.from_iterable(item_lists)), dtype=np.float64, count=count)
+    return float(np.nansum(valores))
+
+def dump_movimientos(items):
+    """Serializa una lista de movimientos a JSON con orjson; las listas vacías se guardan como '[]' directamente."""
+    return orjson.dumps(items, option=orjson.OPT_SERIALIZE_NUMPY).decode() if items else "[]"
+
+def load_movimientos(raw):
+    """
+    Deserializa una columna de movimientos con orjson; las celdas vacías y '[]' se
+    resuelven sin parsear. Las filas guardadas antes con `json.dumps` pueden contener
+    `NaN`, que orjson rechaza; esas se leen con `json`.
+    """
+    if not raw or raw == "[]":
+        return []
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_id_row_map(_registros_ws):
+    """
+    Construye el índice {id_registro: número de fila} de la hoja 'Registros'
+    con una sola lectura de la columna de IDs. Si un ID está repetido se conserva
+    la primera fila, igual que `find()`.
+    """
+    id_rows = {}
+    for row_number, id_registro in enumerate(_registros_ws.col_values(1), start=1):
+        if id_registro:
+            id_rows.setdefault(id_registro, row_number)
+    return id_rows
+
+@st.cache_data(ttl=60, show_spinner=False)
+def read_cuadre(_registros_ws, tienda, fecha_str):
+    """
+    Lee sin formato la fila de un cuadre (tienda, fecha), ubicada con el índice de IDs y en caché 60 s.
+    Si la fila ya no tiene ese ID, descarta el índice y busca una vez más. Retorna None si no existe.
+    """
+    id_registro = f"{tienda}-{fecha_str}"
+    for _ in range(2):
+        row_number = get_id_row_map(_registros_ws).get(id_registro)
+        if row_number is None:
+            return None
+        row_data = _registros_ws.row_values(row_number, value_render_option='UNFORMATTED_VALUE')
+        if row_data and row_data[0] == id_registro:
+            return row_data
+        get_id_row_map.clear()
+    return None
+
+def find_cuadre_row(registros_ws, id_registro):
+    """
+    Busca el cuadre a guardar con una lectura fresca (sin caché) de las columnas de ID y consecutivos.
+    Retorna (fila, consecutivo de tienda, consecutivo global) o (None, None, None) si no existe.
+    """
+    id_rows, global_rows = registros_ws.batch_get(["A:B", "O:O"], value_render_option='UNFORMATTED_VALUE')
+    for index, row in enumerate(id_rows):
+        if row and row[0] == id_registro:
+            global_row = global_rows[index] if index < len(global_rows) else []
+            return index + 1, row[1] if len(row) > 1 else "", global_row[0] if global_row else ""
+    return None, None, None
+
+def invalidate_registros_cache():
+    """Descarta el índice de IDs, las filas leídas y los registros de reportes después de escribir en 'Registros'."""
+    get_id_row_map.clear()
+    read_cuadre.clear()
+    load_report_records.clear()
 
 def load_cuadre_data(registros_ws):
     """Carga los datos de un cuadre existente desde la hoja 'Registros'."""
@@ -689,20 +812,20 @@ def load_cuadre_data(registros_ws):
         st.warning("Por favor, seleccione una tienda primero.")
         return
 
-    id_registro = f"{st.session_state.tienda_seleccionada}-{st.session_state.fecha_seleccionada.strftime('%d/%m/%Y')}"
+    tienda = st.session_state.tienda_seleccionada
+    fecha_str = st.session_state.fecha_seleccionada.strftime('%d/%m/%Y')
     try:
-        cell = registros_ws.find(id_registro, in_column=1)
-        if cell:
-            row_data = registros_ws.row_values(cell.row)
+        row_data = read_cuadre(registros_ws, tienda, fecha_str)
+        if row_data is not None:
             clear_form_state()
 
-            st.session_state.factura_inicial = row_data[4] if len(row_data) > 4 else ""
-            st.session_state.factura_final = row_data[5] if len(row_data) > 5 else ""
+            st.session_state.factura_inicial = str(row_data[4]) if len(row_data) > 4 else ""
+            st.session_state.factura_final = str(row_data[5]) if len(row_data) > 5 else ""
             st.session_state.venta_total_dia = float(row_data[6]) if len(row_data) > 6 and row_data[6] else 0.0
-            st.session_state.tarjetas = json.loads(row_data[7]) if len(row_data) > 7 and row_data[7] else []
-            st.session_state.consignaciones = json.loads(row_data[8]) if len(row_data) > 8 and row_data[8] else []
-            st.session_state.gastos = json.loads(row_data[9]) if len(row_data) > 9 and row_data[9] else []
-            st.session_state.efectivo = json.loads(row_data[10]) if len(row_data) > 10 and row_data[10] else []
+            st.session_state.tarjetas = load_movimientos(row_data[7]) if len(row_data) > 7 else []
+            st.session_state.consignaciones = load_movimientos(row_data[8]) if len(row_data) > 8 else []
+            st.session_state.gastos = load_movimientos(row_data[9]) if len(row_data) > 9 else []
+            st.session_state.efectivo = load_movimientos(row_data[10]) if len(row_data) > 10 else []
             st.toast(f"✅ Cuadre para '{st.session_state.tienda_seleccionada}' cargado.", icon="📄")
         else:
             st.warning("No se encontró un cuadre para esta tienda y fecha. Puede crear uno nuevo.")
@@ -713,47 +836,98 @@ def load_cuadre_data(registros_ws):
 
 # --- FUNCIONES PARA MANEJAR CONSECUTIVOS ---
 
-def get_next_consecutive(consecutivos_ws, tienda):
-    """Obtiene el siguiente número consecutivo para una tienda."""
-    try:
-        cell = consecutivos_ws.find(tienda, in_column=1)
-        if cell:
-            last_consecutive = int(consecutivos_ws.cell(cell.row, 2).value)
-            return last_consecutive + 1
-        else:
-            st.warning(f"No se encontró consecutivo para '{tienda}'. Se usará '1000' por defecto.")
-            return 1000
-    except Exception as e:
-        st.error(f"Error al obtener consecutivo de tienda: {e}")
-        return None
+def read_consecutivos(consecutivos_ws, global_consecutivo_ws):
+    """
+    Lee la tabla de la hoja 'Consecutivos' (columnas A:B) y la celda B1 de
+    'GlobalConsecutivo' en una sola petición `values_batch_get`.
+    """
+    response = consecutivos_ws.spreadsheet.values_batch_get(
+        [sheet_range(consecutivos_ws.title, "A:B"), sheet_range(global_consecutivo_ws.title, "B1")]
+    )
+    value_ranges = response.get("valueRanges", []) + [{}, {}]
+    return value_ranges[0].get("values", []), value_ranges[1].get("values", [])
 
-def update_consecutive(consecutivos_ws, tienda, new_consecutive):
-    """Actualiza el último consecutivo usado para una tienda."""
+def get_next_consecutive(consecutivos_rows, tienda):
+    """
+    Obtiene el siguiente número consecutivo para una tienda y la fila de la tienda
+    en 'Consecutivos' (None si la tienda aún no tiene fila).
+    """
     try:
-        cell = consecutivos_ws.find(tienda, in_column=1)
-        if cell:
-            consecutivos_ws.update_cell(cell.row, 2, new_consecutive)
-        else:
-            consecutivos_ws.append_row([tienda, new_consecutive])
+        for row_number, row in enumerate(consecutivos_rows, start=1):
+            if row and row[0] == tienda:
+                return int(row[1]) + 1, row_number
+        st.warning(f"No se encontró consecutivo para '{tienda}'. Se usará '1000' por defecto.")
+        return 1000, None
     except Exception as e:
-        st.error(f"Error al actualizar consecutivo de tienda: {e}")
+        st.error(f"Error al obtener consecutivo de tienda: {e}")
+        return None, None
 
-def get_next_global_consecutive(global_consecutivo_ws):
-    """Obtiene el siguiente número consecutivo global."""
+def get_next_global_consecutive(global_values):
+    """Obtiene el siguiente número consecutivo global a partir del valor de la celda B1."""
     try:
-        last_consecutive = int(global_consecutivo_ws.acell('B1').value)
+        last_consecutive = int(global_values[0][0])
         return last_consecutive + 1
     except Exception as e:
         st.error(f"Error al obtener consecutivo global desde la hoja 'GlobalConsecutivo': {e}")
         st.warning("Asegúrese que la hoja exista y que la celda B1 contenga un número.")
         return None
 
-def update_global_consecutive(global_consecutivo_ws, new_consecutive):
-    """Actualiza el último consecutivo global usado."""
+def update_consecutives(consecutivos_ws, global_consecutivo_ws, tienda, tienda_row, new_consecutive, new_global_consecutive):
+    """
+    Actualiza el último consecutivo de la tienda y el consecutivo global usados.
+    Ambas celdas se escriben en una sola petición `values_batch_update`; si la tienda
+    no tiene fila (`tienda_row` es None) se agrega al final de 'Consecutivos'. Igual
+    que el guardado del cuadre, se escribe con RAW: los valores son enteros de Python.
+    """
     try:
-        global_consecutivo_ws.update_acell('B1', new_consecutive)
+        data = [{"range": sheet_range(global_consecutivo_ws.title, "B1"), "values": [[new_global_consecutive]]}]
+        if tienda_row:
+            data.append({"range": sheet_range(consecutivos_ws.title, f"B{tienda_row}"), "values": [[new_consecutive]]})
+        else:
+            consecutivos_ws.append_rows([[tienda, new_consecutive]], value_input_option='RAW')
+        consecutivos_ws.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
     except Exception as e:
-        st.error(f"Error al actualizar el consecutivo global: {e}")
+        st.error(f"Error al actualizar los consecutivos de tienda y global: {e}")
+
+def get_editor_base_df(key, columns=None):
+    """
+    Retorna el DataFrame base del editor de `key` ('Valor' en float64, 0 si falta), guardado en session_state.
+    Solo se reconstruye cuando se descarta; las ediciones viven en el estado del `st.data_editor`.
+    """
+    df_key = f"df_{key}"
+    if df_key not in st.session_state:
+        df = pd.DataFrame(st.session_state[key])
+        if columns and set(columns).issubset(df.columns):
+            df = df.reindex(columns=columns)
+        df['Valor'] = np.fromiter(map(get_valor, st.session_state[key]), dtype=np.float64, count=len(df))
+        st.session_state[df_key] = df
+    return st.session_state[df_key]
+
+def reset_editor_base_df(key):
+    """
+    Descarta el DataFrame base del editor de `key` y el estado del widget, para que
+    las filas borradas en el editor no se vuelvan a aplicar sobre la lista nueva.
+    """
+    st.session_state.pop(f"df_{key}", None)
+    st.session_state.pop(f"editor_{key}", None)
+
+@lru_cache(maxsize=32)
+def selectbox_column(col_name, options):
+    """Columna de selección para los editores, memorizada por nombre y tupla de opciones."""
+    return st.column_config.SelectboxColumn(col_name, options=list(options), required=True)
+
+def sync_editor_changes(key, edited_df):
+    """
+    Copia las ediciones del `st.data_editor` a la lista de `key` en session_state.
+    Si el contenido editado no cambió desde la última sincronización (misma huella
+    de `hash_pandas_object`), se omite la conversión a registros. Un 'Valor' vaciado
+    en el editor se guarda como 0, no como NaN.
+    """
+    fingerprint = int(pd.util.hash_pandas_object(edited_df, index=False).sum())
+    if st.session_state.get(f"hash_{key}") == fingerprint:
+        return
+    st.session_state[key] = edited_df.fillna({'Valor': 0.0}).to_dict('records')
+    st.session_state[f"hash_{key}"] = fingerprint
 
 def display_dynamic_list_section(title, key, form_inputs, options_map=None):
     """Función reutilizable para crear secciones del formulario."""
@@ -770,7 +944,7 @@ def display_dynamic_list_section(title, key, form_inputs, options_map=None):
                 elif input_type == "number_input":
                     data[input_key] = cols[i].number_input(label, min_value=0.0, step=1000.0, format="%.0f", label_visibility="collapsed", placeholder=label)
                 elif input_type == "date_input":
-                    data[input_key] = cols[i].date_input(label, value=datetime.now().date(), label_visibility="collapsed", format="DD/MM/YYYY")
+                    data[input_key] = cols[i].date_input(label, value=st.session_state.rerun_now.date(), label_visibility="collapsed", format="DD/MM/YYYY")
                 else:
                     data[input_key] = cols[i].text_input(label, label_visibility="collapsed", placeholder=label)
             
@@ -779,33 +953,24 @@ def display_dynamic_list_section(title, key, form_inputs, options_map=None):
                     if 'Fecha' in data and hasattr(data['Fecha'], 'strftime'):
                         data['Fecha'] = data['Fecha'].strftime("%d/%m/%Y")
                     st.session_state[key].append(data)
+                    reset_editor_base_df(key)
                     st.toast(f"✅ {title.split(' ')[1]} agregado.")
-                    st.rerun()
                 else:
                     st.warning("El valor debe ser mayor a cero.")
 
+        subtotal = 0.0
         if st.session_state[key]:
-            df = pd.DataFrame(st.session_state[key])
-            df['Eliminar'] = False
-            column_config = {
-                "Valor": st.column_config.NumberColumn("Valor", format="$ %.0f", required=True),
-                "Eliminar": st.column_config.CheckboxColumn("Eliminar", width="small")
-            }
+            df = get_editor_base_df(key)
+            column_config = {"Valor": VALOR_COLUMN}
             for col_name, options_list in options_map.items():
                 if col_name in df.columns:
-                    column_config[col_name] = st.column_config.SelectboxColumn(col_name, options=options_list, required=True)
+                    column_config[col_name] = selectbox_column(col_name, tuple(options_list))
 
-            edited_df = st.data_editor(df, key=f'editor_{key}', hide_index=True, use_container_width=True, column_config=column_config)
+            edited_df = st.data_editor(df, key=f'editor_{key}', num_rows="delete", hide_index=True, use_container_width=True, column_config=column_config)
 
-            if edited_df['Eliminar'].any():
-                indices_to_remove = edited_df[edited_df['Eliminar']].index
-                st.session_state[key] = [item for i, item in enumerate(st.session_state[key]) if i not in indices_to_remove]
-                st.toast("🗑️ Registro(s) eliminado(s).")
-                st.rerun()
-            else:
-                st.session_state[key] = edited_df.drop(columns=['Eliminar']).to_dict('records')
+            sync_editor_changes(key, edited_df)
+            subtotal = float(edited_df['Valor'].sum())
 
-        subtotal = sum(float(item.get('Valor', 0)) for item in st.session_state[key])
         st.metric(f"Subtotal {title.split(' ')[1]}", format_currency(subtotal))
 
 def display_tarjetas_section():
@@ -814,7 +979,7 @@ def display_tarjetas_section():
         with st.form("form_tarjetas", clear_on_submit=True):
             c1, c2 = st.columns(2)
             valor = c1.number_input("Valor", min_value=1.0, step=1000.0, format="%.0f", label_visibility="collapsed", placeholder="Valor Tarjeta")
-            fecha = c2.date_input("Fecha", value=datetime.now().date(), label_visibility="collapsed", format="DD/MM/YYYY")
+            fecha = c2.date_input("Fecha", value=st.session_state.rerun_now.date(), label_visibility="collapsed", format="DD/MM/YYYY")
             
             if st.form_submit_button("✚ Agregar Tarjeta", use_container_width=True):
                 if valor > 0:
@@ -822,33 +987,22 @@ def display_tarjetas_section():
                         'Valor': valor,
                         'Fecha': fecha.strftime("%d/%m/%Y")
                     })
+                    reset_editor_base_df('tarjetas')
                     st.toast(f"Agregado: {format_currency(valor)}")
-                    st.rerun()
 
+        subtotal = 0.0
         if st.session_state.tarjetas:
-            df = pd.DataFrame(st.session_state.tarjetas)
-            df['Eliminar'] = False
-            
-            if 'Fecha' in df.columns:
-                df = df[['Fecha', 'Valor', 'Eliminar']]
+            df = get_editor_base_df('tarjetas', columns=['Fecha', 'Valor'])
 
             edited_df = st.data_editor(
-                df, key='editor_tarjetas', hide_index=True, use_container_width=True,
-                column_config={
-                    "Valor": st.column_config.NumberColumn("Valor", format="$ %.0f", required=True),
-                    "Fecha": st.column_config.TextColumn("Fecha", required=True),
-                    "Eliminar": st.column_config.CheckboxColumn("Eliminar", width="small")
-                }
+                df, key='editor_tarjetas', num_rows="delete", hide_index=True, use_container_width=True,
+                column_config=TARJETAS_COLUMN_CONFIG
             )
             
-            if edited_df['Eliminar'].any():
-                st.session_state.tarjetas = [t for i, t in enumerate(st.session_state.tarjetas) if i not in edited_df[edited_df['Eliminar']].index]
-                st.toast("Tarjeta(s) eliminada(s).")
-                st.rerun()
-            else:
-                st.session_state.tarjetas = edited_df.drop(columns=['Eliminar']).to_dict('records')
+            sync_editor_changes('tarjetas', edited_df)
+            subtotal = float(edited_df['Valor'].sum())
                 
-        st.metric("Subtotal Tarjetas", format_currency(sum(float(t.get('Valor', 0)) for t in st.session_state.tarjetas)))
+        st.metric("Subtotal Tarjetas", format_currency(subtotal))
 
 def display_consignaciones_section(bancos_list):
     display_dynamic_list_section(
@@ -888,11 +1042,7 @@ def display_summary_and_save(worksheets):
     registros_ws, _, consecutivos_ws, global_consecutivo_ws = worksheets
 
     with st.container(border=True):
-        sub_t = sum(float(t.get('Valor', 0)) for t in st.session_state.tarjetas)
-        sub_c = sum(float(c.get('Valor', 0)) for c in st.session_state.consignaciones)
-        sub_g = sum(float(g.get('Valor', 0)) for g in st.session_state.gastos)
-        sub_e = sum(float(e.get('Valor', 0)) for e in st.session_state.efectivo)
-        total_desglose = sub_t + sub_c + sub_g + sub_e
+        total_desglose = sum_valores(*(st.session_state[key] for key in MOVIMIENTO_KEYS))
         venta_total = float(st.session_state.get('venta_total_dia', 0.0))
         diferencia = venta_total - total_desglose
 
@@ -915,37 +1065,35 @@ def display_summary_and_save(worksheets):
             id_registro = f"{tienda}-{fecha_str}"
 
             try:
-                cell = registros_ws.find(id_registro, in_column=1)
+                row_number, consecutivo_asignado_tienda, consecutivo_global_doc = find_cuadre_row(registros_ws, id_registro)
                 
-                if cell:
-                    consecutivo_asignado_tienda = registros_ws.cell(cell.row, 2).value
-                    consecutivo_global_doc = registros_ws.cell(cell.row, 15).value
-                else:
-                    consecutivo_asignado_tienda = get_next_consecutive(consecutivos_ws, tienda)
-                    consecutivo_global_doc = get_next_global_consecutive(global_consecutivo_ws)
+                if not row_number:
+                    consecutivos_rows, global_values = read_consecutivos(consecutivos_ws, global_consecutivo_ws)
+                    consecutivo_asignado_tienda, tienda_row = get_next_consecutive(consecutivos_rows, tienda)
+                    consecutivo_global_doc = get_next_global_consecutive(global_values)
                     
                     if consecutivo_asignado_tienda is None or consecutivo_global_doc is None:
                         st.error("No se pudo generar uno de los consecutivos. No se guardará el registro.")
                         return
                     
-                    update_consecutive(consecutivos_ws, tienda, consecutivo_asignado_tienda)
-                    update_global_consecutive(global_consecutivo_ws, consecutivo_global_doc)
+                    update_consecutives(consecutivos_ws, global_consecutivo_ws, tienda, tienda_row, consecutivo_asignado_tienda, consecutivo_global_doc)
 
                 fila_datos = [
                     id_registro, consecutivo_asignado_tienda, tienda, fecha_str,
                     st.session_state.factura_inicial, st.session_state.factura_final, venta_total,
-                    json.dumps(st.session_state.tarjetas), json.dumps(st.session_state.consignaciones),
-                    json.dumps(st.session_state.gastos), json.dumps(st.session_state.efectivo),
-                    diferencia, datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                    *(dump_movimientos(st.session_state[key]) for key in MOVIMIENTO_KEYS),
+                    diferencia, st.session_state.rerun_now.strftime("%d/%m/%Y %H:%M:%S"),
                     "", 
                     consecutivo_global_doc
                 ]
 
-                if cell:
-                    registros_ws.update(f'A{cell.row}', [fila_datos])
+                if row_number:
+                    registros_ws.update(values=[fila_datos], range_name=f'A{row_number}', value_input_option='RAW')
+                    invalidate_registros_cache()
                     st.success(f"✅ Cuadre para {tienda} el {fecha_str} fue **actualizado**!")
                 else:
-                    registros_ws.append_row(fila_datos)
+                    registros_ws.append_rows([fila_datos], value_input_option='RAW')
+                    invalidate_registros_cache()
                     st.success(f"✅ Cuadre para {tienda} el {fecha_str} fue **guardado** con el consecutivo de referencia **{consecutivo_asignado_tienda}** y de documento **{consecutivo_global_doc}**!")
             except Exception as e:
                 st.error(f"Error al guardar los datos en Google Sheets: {e}")
@@ -968,7 +1116,7 @@ def render_form_page(worksheets, config):
         st.session_state.tienda_seleccionada = default_store
     
     st.header("1. Selección de Registro", anchor=False, divider="rainbow")
-    c1,c2,c3,c4 = st.columns([2,2,1,1])
+    c1,c2,c3,c4 = st.columns(SELECTION_COLUMNS_SPEC, vertical_alignment="bottom")
     c1.selectbox(
         "Tienda",
         options=allowed_tiendas,
@@ -978,12 +1126,8 @@ def render_form_page(worksheets, config):
         disabled=store_locked,
     )
     c2.date_input("Fecha", key="fecha_seleccionada", on_change=clear_form_state, format="DD/MM/YYYY")
-    with c3:
-        st.write(" ")
-        st.button("🔍 Cargar Cuadre", on_click=load_cuadre_data, args=[registros_ws], use_container_width=True)
-    with c4:
-        st.write(" ")
-        st.button("✨ Iniciar Nuevo", on_click=clear_form_state, use_container_width=True)
+    c3.button("🔍 Cargar Cuadre", on_click=load_cuadre_data, args=[registros_ws], use_container_width=True)
+    c4.button("✨ Iniciar Nuevo", on_click=clear_form_state, use_container_width=True)
 
     if store_locked:
         st.caption(f"Perfil restringido a la serie: {', '.join(allowed_tiendas)}")
@@ -998,6 +1142,18 @@ def render_form_page(worksheets, config):
         st.session_state.factura_final=c2.text_input("Factura Final", value=st.session_state.get('factura_final', ""))
         st.session_state.venta_total_dia=c3.number_input("💰 Venta Total (Sistema)",min_value=0.0,step=1000.0,value=float(st.session_state.get('venta_total_dia', 0.0)),format="%.0f")
 
+    render_desglose_y_resumen(worksheets, bancos, terceros)
+
+@st.fragment
+def render_desglose_y_resumen(worksheets, bancos, terceros):
+    """
+    Renderiza el desglose de pagos y la verificación como un fragmento: agregar,
+    editar o eliminar movimientos solo vuelve a ejecutar esta parte de la página,
+    y el resumen se mantiene al día porque pertenece al mismo fragmento.
+    """
+    # Los reruns del fragmento no pasan por main(); se renueva la marca de tiempo.
+    st.session_state.rerun_now = datetime.now()
+
     with st.container(border=True):
         st.subheader("🧾 Desglose de Pagos")
         display_tarjetas_section()
@@ -1012,7 +1168,7 @@ def render_reports_page(registros_ws, config_ws, tiendas_list):
     st.header("Generación de Archivos y Reportes", divider="rainbow")
     st.markdown("Seleccione una tienda y un rango de fechas para generar los archivos para el sistema contable y los reportes de soporte.")
 
-    today = datetime.now().date()
+    today = st.session_state.rerun_now.date()
     col1, col2, col3 = st.columns(3)
     allowed_tiendas = filter_stores_for_access(tiendas_list)
     store_locked = is_store_profile_active()
@@ -1033,6 +1189,9 @@ def render_reports_page(registros_ws, config_ws, tiendas_list):
         st.error("Error: La fecha de inicio no puede ser posterior a la fecha de fin.")
         return
 
+    if st.button("🔄 Actualizar datos de Registros"):
+        load_report_records.clear()
+
     st.divider()
     
     b1, b2, b3 = st.columns(3)
@@ -1054,7 +1213,7 @@ def render_reports_page(registros_ws, config_ws, tiendas_list):
     with b2:
         if st.button("📊 Generar Reporte Excel", use_container_width=True, type="primary"):
             with st.spinner('Creando un Excel impecable...'):
-                excel_data = generate_excel_report(registros_ws, start_date, end_date, selected_store)
+                excel_data = generate_excel_report(registros_ws, config_ws, start_date, end_date, selected_store)
                 if excel_data:
                     st.download_button(
                         label="📥 Descargar Reporte .xlsx",
@@ -1072,7 +1231,7 @@ def render_reports_page(registros_ws, config_ws, tiendas_list):
             
             if submitted:
                 if recipient_email and "@" in recipient_email:
-                    send_summary_email(registros_ws, start_date, end_date, selected_store, recipient_email)
+                    send_summary_email(registros_ws, config_ws, start_date, end_date, selected_store, recipient_email)
                 else:
                     st.warning("Por favor, ingrese una dirección de correo válida.")
 
@@ -1080,6 +1239,8 @@ def render_reports_page(registros_ws, config_ws, tiendas_list):
 # --- 7. FLUJO PRINCIPAL DE LA APLICACIÓN ---
 def main():
     """Función principal que ejecuta la aplicación Streamlit."""
+    # Marca de tiempo única por rerun para los valores por defecto y el guardado.
+    st.session_state.rerun_now = datetime.now()
     render_sidebar("Cuadre diario")
     st.title("CUADRE DIARIO DE CAJA")
 
@@ -1100,6 +1261,9 @@ def main():
                 st.session_state.page = "Formulario"
             else:
                 st.session_state.page = "Reportes"
+
+            if st.button("🔄 Recargar configuración", use_container_width=True):
+                load_app_config.clear()
         
         config = get_app_config(config_ws)
         tiendas, _, _ = config
@@ -18,7 +18,7 @@ import pandas as pd
 import streamlit as st
 import yagmail
 from dropbox.exceptions import ApiError
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 
 
 APP_DIR = Path(__file__).resolve().parent
@@ -40,6 +40,10 @@ VEHICLE_INSPECTION_PAGE = "pages/6_Inspeccion_Preoperacional_Vehiculos.py"
 INSPECTION_ADMIN_PAGE = "pages/7_Gestion_de_Inspecciones.py"
 DEFAULT_APPROVAL_URL = "https://planillas-cuadre-diario-contabilidad.streamlit.app/Solicitudes_de_Permisos"
 COLOMBIA_TZ = ZoneInfo("America/Bogota")
+GOOGLE_SHEETS_SCOPES = (
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+)
 GOOGLE_SHEETS_RETRY_ATTEMPTS = 4
 GOOGLE_SHEETS_RETRY_BASE_SECONDS = 0.8
 SOLICITUDES_READ_CACHE_TTL_SECONDS = 120
@@ -588,11 +592,19 @@ def reset_session_state(*preserved_keys: str) -> None:
     initialize_access_state()
 
 
+@st.cache_resource
+def load_logo_bytes() -> bytes | None:
+    if not LOGO_PATH.exists():
+        return None
+    return LOGO_PATH.read_bytes()
+
+
 def render_brand_header(title: str, subtitle: str = "") -> None:
     header_cols = st.columns([1, 4])
     with header_cols[0]:
-        if LOGO_PATH.exists():
-            st.image(str(LOGO_PATH), width=120)
+        logo = load_logo_bytes()
+        if logo:
+            st.image(logo, width=120)
     with header_cols[1]:
         st.title(title)
         if subtitle:
@@ -665,8 +677,9 @@ def render_sidebar(active_label: str) -> None:
     initialize_access_state()
     store_profiles = get_store_profiles()
     with st.sidebar:
-        if LOGO_PATH.exists():
-            st.image(str(LOGO_PATH), width=170)
+        logo = load_logo_bytes()
+        if logo:
+            st.image(logo, width=170)
         st.markdown("### Accesos")
         st.page_link(SOLICITUD_PAGE, label="Solicitud de permisos", icon="📝")
         st.page_link(MOTO_INSPECTION_PAGE, label="Inspeccion motos", icon="🏍️")
@@ -847,8 +860,7 @@ def find_employee_by_cedula(cedula: str) -> dict[str, str] | None:
 @st.cache_resource(ttl=600)
 def connect_to_base_spreadsheet():
     creds_json = dict(st.secrets["google_credentials"])
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
+    creds = Credentials.from_service_account_info(creds_json, scopes=GOOGLE_SHEETS_SCOPES)
     client = gspread.authorize(creds)
     spreadsheet_name = st.secrets["google_sheets"]["spreadsheet_name"]
     spreadsheet = client.open(spreadsheet_name)
@@ -882,8 +894,14 @@ def _column_letter(column_number: int) -> str:
     return result
 
 
+def sheet_range(title: str, cell_range: str | None = None) -> str:
+    escaped_title = title.replace("'", "''")
+    quoted_title = f"'{escaped_title}'"
+    return f"{quoted_title}!{cell_range}" if cell_range else quoted_title
+
+
 def _sheet_range(title: str, cell_range: str) -> str:
-    return f"'{title.replace("'", "''")}'!{cell_range}"
+    return sheet_range(title, cell_range)
 
 
 def _worksheet_has_content(rows: list[list[object]]) -> bool:
@@ -4,7 +4,7 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 import gspread
 from datetime import datetime, timedelta
 from itertools import groupby
@@ -17,6 +17,7 @@ from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 
 from app_shared import (
+    GOOGLE_SHEETS_SCOPES,
     current_authorized_series,
     filter_series_for_access,
     get_receipt_series_options,
@@ -63,8 +64,7 @@ def connect_to_gsheet():
              return None, None, None, None
 
         creds_json = dict(credenciales)
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
+        creds = Credentials.from_service_account_info(creds_json, scopes=GOOGLE_SHEETS_SCOPES)
         client = gspread.authorize(creds)
         
         spreadsheet_name = "Planillas_Ferreinox"
@@ -4,7 +4,7 @@
 # ======================================================================================
 import streamlit as st
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
 from datetime import datetime
 import json
 import pandas as pd
@@ -14,7 +14,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 
-from app_shared import initialize_access_state, render_sidebar, require_access
+from app_shared import GOOGLE_SHEETS_SCOPES, initialize_access_state, render_sidebar, require_access
 
 # --- 1. CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(layout="wide", page_title="Gestión de Viáticos")
@@ -25,8 +25,7 @@ def connect_to_gsheet_viaticos():
     """Establece conexión con Google Sheets y retorna las hojas para el módulo de viáticos."""
     try:
         creds_json = dict(st.secrets["google_credentials"])
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json, scope)
+        creds = Credentials.from_service_account_info(creds_json, scopes=GOOGLE_SHEETS_SCOPES)
         client = gspread.authorize(creds)
         sheet = client.open(st.secrets["google_sheets"]["spreadsheet_name"])
         